@@ -1,10 +1,14 @@
 import streamlit as st
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
+import numpy as np
 import re
+import csv
+import io
+import hashlib
+import zlib
 from urllib.parse import urlparse
 import time
+import threading
 import smtplib
 import os
 import json
@@ -22,7 +26,15 @@ def init_database():
     """Initialize SQLite database with required tables."""
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
-    
+
+    # WAL persists in the database file; the other pragmas are re-applied
+    # per connection. synchronous=NORMAL halves the fsyncs per commit on
+    # this write-heavy log/schedule workload.
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-20000")
+
     # Scheduled emails table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS scheduled_emails (
@@ -54,24 +66,55 @@ def init_database():
             notes TEXT
         )
     ''')
-    
+
+    # Partial batch results, persisted per run so an interrupted batch
+    # survives a Streamlit restart
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS batch_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id TEXT,
+            row_json TEXT
+        )
+    ''')
+
+    # Indexes so the ORDER BY ... LIMIT listing queries and the
+    # due-email scan are index walks instead of full sorts
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sched_time ON scheduled_emails(scheduled_time, status)')
+    # status-first variant: the due-email scan filters on status = 'Pending'
+    # before the time range, so this one lets SQLite skip sent/failed rows
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sched_status_time ON scheduled_emails(status, scheduled_time)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_log_ts ON email_log(timestamp)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_batch_run ON batch_runs(run_id)')
+
     conn.commit()
     conn.close()
 
 
+# Parsed config cached against the file's mtime so hot paths (every email
+# send, every sidebar render) skip the open + json.load when unchanged
+_CFG_CACHE = {"mtime": None, "data": None}
+
+_DEFAULT_CONFIG = {"gmail_address": "", "gmail_app_password": "", "sender_name": ""}
+
+
 def load_config():
-    """Load Gmail credentials from config.json file."""
+    """Load Gmail credentials from config.json file (mtime-cached)."""
     try:
-        with open(CONFIG_PATH, 'r') as f:
-            return json.load(f)
+        mtime = os.stat(CONFIG_PATH).st_mtime_ns
+        if mtime != _CFG_CACHE["mtime"]:
+            with open(CONFIG_PATH, 'r') as f:
+                _CFG_CACHE["data"] = json.load(f)
+            _CFG_CACHE["mtime"] = mtime
+        return _CFG_CACHE["data"]
     except:
-        return {"gmail_address": "", "gmail_app_password": "", "sender_name": ""}
+        return dict(_DEFAULT_CONFIG)
 
 
 def save_config(config):
     """Save Gmail credentials to config.json file."""
     with open(CONFIG_PATH, 'w') as f:
         json.dump(config, f, indent=4)
+    _CFG_CACHE["mtime"] = None  # force reload on next read
 
 
 # Initialize database on app start
@@ -85,96 +128,277 @@ if 'approval_state' not in st.session_state:
     st.session_state.approval_state = {}
 
 
-# --- GMAIL SENDING FUNCTION ---
+# --- GMAIL SENDING ---
+def build_message(sender_address, recipient_email, subject, body):
+    """Build a plain-text MIME message."""
+    msg = MIMEMultipart()
+    msg['From'] = sender_address
+    msg['To'] = recipient_email
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+
+class GmailSender:
+    """Reusable Gmail SMTP connection for sending batches.
+
+    Logs in once and reuses the socket across sends - opening a fresh
+    SMTP_SSL connection per message pays a full TLS handshake plus AUTH
+    each time, which dominates the cost of small sends. The connection
+    is recycled every max_per_connection messages to stay under Gmail's
+    per-connection limits, and a stale socket is reconnected once.
+    """
+
+    def __init__(self, max_per_connection=100):
+        config = load_config()
+        self.address = config.get('gmail_address') or os.environ.get('GMAIL_ADDRESS')
+        self.password = config.get('gmail_app_password') or os.environ.get('GMAIL_APP_PASSWORD')
+        self.max_per_connection = max_per_connection
+        self.server = None
+        self.sent_on_connection = 0
+
+    def __enter__(self):
+        if not self.address or not self.password:
+            raise RuntimeError("Gmail credentials not configured. Set them in Settings (sidebar) or in config.json")
+        self._connect()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._close()
+
+    def _connect(self):
+        self.server = smtplib.SMTP_SSL('smtp.gmail.com', 465)
+        self.server.login(self.address, self.password)
+        self.sent_on_connection = 0
+
+    def _close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except Exception:
+                pass
+            self.server = None
+
+    def _ensure_connection(self):
+        """(Re)connect if the socket is missing, recycled out, or stale."""
+        if self.server is not None and self.sent_on_connection >= self.max_per_connection:
+            self._close()
+        if self.server is not None:
+            try:
+                self.server.noop()
+            except smtplib.SMTPException:
+                self._close()
+        if self.server is None:
+            self._connect()
+
+    def send(self, msg):
+        """Send one message, retrying transient failures with backoff.
+
+        Dropped connections and 4xx (temporary) SMTP responses get up to
+        two retries with 1s then 2s waits; permanent errors (bad auth,
+        rejected address) propagate immediately. Reconnects happen inside
+        the retry loop so a failed reconnect counts as that attempt's
+        error instead of escaping with self.server left as None - later
+        sends on this instance get a fresh connection attempt.
+        """
+        last_error = None
+        for attempt in range(3):
+            if attempt:
+                time.sleep(2 ** (attempt - 1))
+            try:
+                self._ensure_connection()
+                self.server.send_message(msg)
+                self.sent_on_connection += 1
+                return
+            except smtplib.SMTPServerDisconnected as e:
+                last_error = e
+                self._close()
+            except smtplib.SMTPResponseException as e:
+                if not 400 <= e.smtp_code < 500:
+                    raise
+                last_error = e
+            except (OSError, smtplib.SMTPException) as e:
+                # Connect/login failures land here; drop the dead handle
+                # so the next attempt reconnects from scratch
+                last_error = e
+                self._close()
+        raise last_error
+
+
 def send_email_gmail(recipient_email, subject, body):
-    """Send email via Gmail SMTP using config.json credentials."""
-    config = load_config()
-    gmail_address = config.get('gmail_address') or os.environ.get('GMAIL_ADDRESS')
-    gmail_password = config.get('gmail_app_password') or os.environ.get('GMAIL_APP_PASSWORD')
-    
-    if not gmail_address or not gmail_password:
-        return False, "Gmail credentials not configured. Set them in Settings (sidebar) or in config.json"
-    
+    """Send a single email via Gmail SMTP using config.json credentials."""
     try:
-        msg = MIMEMultipart()
-        msg['From'] = gmail_address
-        msg['To'] = recipient_email
-        msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'plain'))
-        
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as server:
-            server.login(gmail_address, gmail_password)
-            server.send_message(msg)
-        
+        with GmailSender() as sender:
+            sender.send(build_message(sender.address, recipient_email, subject, body))
         return True, "Email sent successfully!"
+    except RuntimeError as e:
+        return False, str(e)
     except smtplib.SMTPAuthenticationError:
         return False, "Gmail authentication failed. Check your App Password."
     except Exception as e:
         return False, f"Failed to send: {str(e)}"
 
 
+def _now_str():
+    """Current time as 'YYYY-MM-DD HH:MM:SS'.
+
+    isoformat is about twice as fast as the locale-aware strftime and
+    produces byte-identical strings, so comparisons against rows written
+    before this change still work.
+    """
+    return datetime.now().isoformat(sep=' ', timespec='seconds')
+
+
+@st.cache_resource
+def get_conn():
+    """Process-wide SQLite connection, shared across reruns.
+
+    Opening a connection per call paid setup plus SQL re-parsing every
+    time; one cached connection keeps sqlite3's statement cache warm.
+    WAL mode lets the background scheduler write while the UI reads.
+    CPython's sqlite3 serializes individual calls, but transactions span
+    several calls - every write transaction on this connection must hold
+    _DB_WRITE_LOCK so the scheduler thread and the script thread can't
+    commit or roll back each other's half-finished batches.
+    """
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=128)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+# Guards multi-statement write transactions on the shared connection
+_DB_WRITE_LOCK = threading.Lock()
+
+
+# Logged bodies can be several KB per row; storing them zstd-compressed
+# keeps SQLite pages small so listing queries touch fewer pages. Rows
+# written before this change (or without zstandard installed) stay plain.
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def _compress_body(body):
+    """Compress an email body for log storage (plain text when zstd absent)."""
+    if zstandard is None:
+        return body
+    return zstandard.ZstdCompressor().compress(body.encode())
+
+
+def _decompress_body(blob):
+    """Inverse of _compress_body; tolerates legacy plain-text rows."""
+    if isinstance(blob, bytes):
+        if zstandard is not None:
+            try:
+                return zstandard.ZstdDecompressor().decompress(blob).decode()
+            except zstandard.ZstdError:
+                pass
+        return blob.decode(errors='replace')
+    return blob
+
+
+def get_email_body(row_id):
+    """Fetch and decompress a single logged email body on demand."""
+    row = get_conn().execute('SELECT body FROM email_log WHERE id = ?', (row_id,)).fetchone()
+    return _decompress_body(row[0]) if row else None
+
+
+# SQL kept as module constants so bulk and single-row paths share them
+_LOG_INSERT_SQL = '''
+    INSERT INTO email_log (timestamp, company_name, website, contact_email, niche, subject, body, status, notes)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+_SCHEDULE_INSERT_SQL = '''
+    INSERT INTO scheduled_emails (recipient, subject, body, company_name, website, niche, scheduled_time, status, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, 'Pending', ?)
+'''
+
+
+def log_emails_bulk(rows):
+    """Insert many email-log rows in one transaction.
+
+    Committing per row costs one fsync each; batching pays it once for
+    the whole list. rows are tuples matching _LOG_INSERT_SQL.
+    """
+    if not rows:
+        return
+    conn = get_conn()
+    with _DB_WRITE_LOCK, conn:
+        conn.executemany(_LOG_INSERT_SQL, rows)
+
+
+def schedule_emails_bulk(rows):
+    """Insert many scheduled-email rows in one transaction."""
+    if not rows:
+        return
+    conn = get_conn()
+    with _DB_WRITE_LOCK, conn:
+        conn.executemany(_SCHEDULE_INSERT_SQL, rows)
+
+
 def log_email(company_name, website, contact_email, niche, subject, body, sent_status, notes=""):
     """Add entry to email tracking log in database."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO email_log (timestamp, company_name, website, contact_email, niche, subject, body, status, notes)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (
-        datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        company_name, website, contact_email, niche, subject, 
-        body.replace('\n', ' '), sent_status, notes
-    ))
-    conn.commit()
-    conn.close()
+    log_emails_bulk([(
+        _now_str(),
+        company_name, website, contact_email, niche, subject,
+        _compress_body(body.replace('\n', ' ')), sent_status, notes
+    )])
 
 
 def schedule_email_db(recipient_email, subject, body, scheduled_datetime, company_name, website, niche):
     """Schedule an email in the database for the background scheduler to process."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO scheduled_emails (recipient, subject, body, company_name, website, niche, scheduled_time, status, created_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?, 'Pending', ?)
-    ''', (
+    schedule_emails_bulk([(
         recipient_email, subject, body, company_name, website, niche,
-        scheduled_datetime.strftime("%Y-%m-%d %H:%M:%S"),
-        datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    ))
-    conn.commit()
-    conn.close()
+        scheduled_datetime.isoformat(sep=' ', timespec='seconds'),
+        _now_str()
+    )])
     return scheduled_datetime
 
 
+# Display names are aliased in SQL so the DataFrames land render-ready
+_SCHEDULED_SELECT_SQL = '''
+    SELECT id AS "ID", recipient AS "Recipient", subject AS "Subject",
+           scheduled_time AS "Scheduled Time", status AS "Status"
+    FROM scheduled_emails ORDER BY scheduled_time DESC LIMIT 50
+'''
+_LOG_SELECT_SQL = '''
+    SELECT timestamp AS "Timestamp", company_name AS "Company", website AS "Website",
+           contact_email AS "Email", niche AS "Niche", subject AS "Subject",
+           status AS "Status", notes AS "Notes"
+    FROM email_log ORDER BY timestamp DESC LIMIT ? OFFSET ?
+'''
+
+
 def get_scheduled_emails():
-    """Get all scheduled emails from database."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('SELECT id, recipient, subject, scheduled_time, status FROM scheduled_emails ORDER BY scheduled_time DESC LIMIT 50')
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+    """Get scheduled emails as a DataFrame, newest first."""
+    return pd.read_sql_query(_SCHEDULED_SELECT_SQL, get_conn())
 
 
-def get_email_log():
-    """Get email log from database."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('SELECT timestamp, company_name, website, contact_email, niche, subject, status, notes FROM email_log ORDER BY timestamp DESC LIMIT 100')
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+def get_email_log(page=1, page_size=100):
+    """Get one page of the email log as a DataFrame, newest first."""
+    offset = (max(page, 1) - 1) * page_size
+    return pd.read_sql_query(_LOG_SELECT_SQL, get_conn(), params=(page_size, offset))
+
+
+def get_email_log_count():
+    """Total number of rows in the email log."""
+    return get_conn().execute('SELECT COUNT(*) FROM email_log').fetchone()[0]
 
 
 # --- INTEGRATED BACKGROUND SCHEDULER ---
-import threading
+import queue
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 def process_pending_emails():
     """Check for due emails and send them."""
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_conn()
     cursor = conn.cursor()
     
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    now = _now_str()
     cursor.execute('''
         SELECT id, recipient, subject, body, company_name, website, niche 
         FROM scheduled_emails 
@@ -182,27 +406,46 @@ def process_pending_emails():
     ''', (now,))
     
     due_emails = cursor.fetchall()
-    
-    for email in due_emails:
-        email_id, recipient, subject, body, company_name, website, niche = email
-        success, message = send_email_gmail(recipient, subject, body)
-        
-        new_status = 'Sent' if success else f'Failed: {message}'
-        cursor.execute('UPDATE scheduled_emails SET status = ? WHERE id = ?', (new_status, email_id))
-        
-        # Log the email
-        cursor.execute('''
-            INSERT INTO email_log (timestamp, company_name, website, contact_email, niche, subject, body, status, notes)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            company_name, website, recipient, niche, subject, body,
-            'Yes (Scheduled)' if success else 'Failed (Scheduled)',
-            message if not success else ''
-        ))
-    
-    conn.commit()
-    conn.close()
+
+    # Send everything due over one SMTP connection instead of paying a
+    # TLS handshake + AUTH per message
+    outcomes = []
+    if due_emails:
+        try:
+            with GmailSender() as sender:
+                for email in due_emails:
+                    recipient, subject, body = email[1], email[2], email[3]
+                    try:
+                        sender.send(build_message(sender.address, recipient, subject, body))
+                        outcomes.append((email, True, ""))
+                    except Exception as e:
+                        outcomes.append((email, False, str(e)))
+        except Exception as e:
+            # Connection or auth failure - every due email fails the same way
+            outcomes = [(email, False, str(e)) for email in due_emails]
+
+    # The lock keeps this multi-statement transaction atomic against the
+    # script thread's writes - a concurrent commit/rollback here could
+    # undo a 'Sent' status after the SMTP send already happened
+    with _DB_WRITE_LOCK:
+        for email, success, message in outcomes:
+            email_id, recipient, subject, body, company_name, website, niche = email
+
+            new_status = 'Sent' if success else f'Failed: {message}'
+            cursor.execute('UPDATE scheduled_emails SET status = ? WHERE id = ?', (new_status, email_id))
+
+            # Log the email
+            cursor.execute('''
+                INSERT INTO email_log (timestamp, company_name, website, contact_email, niche, subject, body, status, notes)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                _now_str(),
+                company_name, website, recipient, niche, subject, _compress_body(body),
+                'Yes (Scheduled)' if success else 'Failed (Scheduled)',
+                message
+            ))
+
+        conn.commit()
     return len(due_emails)
 
 
@@ -230,427 +473,417 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-st.markdown("""
-    <style>
-    @import url('https://fonts.googleapis.com/css2?family=DM+Sans:wght@400;500;600;700&display=swap');
-    
-    /* Base Styles - Premium Dark Theme */
-    html, body, [class*="css"] {
-        font-family: 'DM Sans', sans-serif;
-        color: #E8ECF4;
-    }
-    
-    /* Main Background - Rich dark with subtle gradient */
-    .stApp {
-        background: linear-gradient(180deg, #0D0D12 0%, #13131A 100%);
-    }
-    
-    /* SIDEBAR TOGGLE - Fixed visible button */
-    [data-testid="collapsedControl"] {
-        display: block !important;
-        visibility: visible !important;
-        position: fixed !important;
-        top: 14px !important;
-        left: 14px !important;
-        z-index: 999999 !important;
-        background: linear-gradient(135deg, #6366F1 0%, #8B5CF6 100%) !important;
-        border-radius: 10px !important;
-        padding: 8px !important;
-        box-shadow: 0 4px 15px rgba(99, 102, 241, 0.4) !important;
-    }
-    
-    [data-testid="collapsedControl"] svg {
-        color: white !important;
-        width: 20px !important;
-        height: 20px !important;
-    }
-    
-    [data-testid="collapsedControl"]:hover {
-        transform: scale(1.05) !important;
-        box-shadow: 0 6px 20px rgba(99, 102, 241, 0.6) !important;
-    }
-    
-    /* Hide default header buttons that might overlap */
-    button[kind="header"] {
-        visibility: visible !important;
-    }
-    
-    /* Premium Sidebar */
-    section[data-testid="stSidebar"] {
-        background: linear-gradient(180deg, #111118 0%, #0D0D12 100%);
-        border-right: 1px solid rgba(255, 255, 255, 0.06);
-    }
-    
-    section[data-testid="stSidebar"] > div {
-        background: transparent;
-    }
+@st.cache_data
+def _load_css():
+    """Read the theme stylesheet once per server process."""
+    with open(os.path.join(os.path.dirname(__file__), 'styles.css')) as f:
+        return f.read()
 
-    
-    /* Premium Cards */
-    .card {
-        background: rgba(255, 255, 255, 0.03);
-        border: 1px solid rgba(255, 255, 255, 0.06);
-        border-radius: 16px;
-        padding: 24px;
-        margin-bottom: 16px;
-    }
-    
-    /* Issue Items - Subtle amber accent */
-    .issue-item {
-        background: rgba(251, 191, 36, 0.08);
-        border: 1px solid rgba(251, 191, 36, 0.15);
-        border-left: 3px solid #F59E0B;
-        padding: 16px 20px;
-        margin: 12px 0;
-        border-radius: 12px;
-        font-size: 14px;
-        color: #FCD34D;
-        transition: all 0.25s ease;
-    }
-    
-    .issue-item:hover {
-        background: rgba(251, 191, 36, 0.12);
-        transform: translateX(6px);
-    }
-    
-    /* Email Output - Premium container */
-    .email-output {
-        background: rgba(255, 255, 255, 0.02);
-        border: 1px solid rgba(255, 255, 255, 0.08);
-        border-radius: 16px;
-        padding: 28px;
-        font-family: 'DM Sans', sans-serif;
-        font-size: 14px;
-        line-height: 1.85;
-        white-space: pre-wrap;
-        color: #D1D5DB;
-    }
-    
-    /* Input Fields - Premium glass style */
-    .stTextInput > div > div > input, 
-    .stTextArea > div > div > textarea,
-    .stSelectbox > div > div {
-        background: rgba(255, 255, 255, 0.04) !important;
-        background-color: rgba(20, 20, 30, 0.8) !important;
-        border: 1px solid rgba(255, 255, 255, 0.15) !important;
-        color: #FFFFFF !important;
-        border-radius: 12px !important;
-        transition: all 0.25s ease;
-        font-family: 'DM Sans', sans-serif !important;
-    }
-    
-    /* Force text color in inputs */
-    input, textarea, select {
-        color: #FFFFFF !important;
-        -webkit-text-fill-color: #FFFFFF !important;
-    }
-    
-    .stTextInput input {
-        color: #FFFFFF !important;
-        -webkit-text-fill-color: #FFFFFF !important;
-    }
-    
-    .stTextArea textarea {
-        color: #FFFFFF !important;
-        -webkit-text-fill-color: #FFFFFF !important;
-        background-color: rgba(20, 20, 30, 0.8) !important;
-    }
-    
-    .stTextInput > div > div > input:focus, 
-    .stTextArea > div > div > textarea:focus {
-        border-color: #6366F1 !important;
-        box-shadow: 0 0 0 3px rgba(99, 102, 241, 0.15) !important;
-    }
-    
-    .stTextInput > div > div > input::placeholder,
-    .stTextArea > div > div > textarea::placeholder {
-        color: #6B7280 !important;
-        -webkit-text-fill-color: #6B7280 !important;
-    }
-    
-    /* Selectbox styling */
-    .stSelectbox > div > div > div {
-        background: rgba(20, 20, 30, 0.8) !important;
-        border-radius: 12px !important;
-        color: #FFFFFF !important;
-    }
-    
-    .stSelectbox [data-baseweb="select"] span {
-        color: #FFFFFF !important;
-    }
-    
-    /* Primary Button - Premium gradient */
-    .stButton > button {
-        background: linear-gradient(135deg, #6366F1 0%, #8B5CF6 100%);
-        color: white;
-        border: none;
-        border-radius: 12px;
-        font-weight: 600;
-        font-family: 'DM Sans', sans-serif;
-        padding: 0.6rem 1.4rem;
-        transition: all 0.25s ease;
-        box-shadow: 0 4px 14px rgba(99, 102, 241, 0.25);
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 8px 25px rgba(99, 102, 241, 0.35);
-    }
-    
-    .stButton > button:active {
-        transform: translateY(0);
-    }
-    
-    /* Download Button - Ghost style */
-    .stDownloadButton > button {
-        background: transparent;
-        border: 1px solid rgba(255, 255, 255, 0.15);
-        color: #E8ECF4;
-        border-radius: 12px;
-        font-weight: 500;
-        font-family: 'DM Sans', sans-serif;
-        transition: all 0.25s ease;
-    }
-    
-    .stDownloadButton > button:hover {
-        background: rgba(255, 255, 255, 0.05);
-        border-color: rgba(255, 255, 255, 0.25);
-    }
-    
-    /* Section Headers */
-    h1 {
-        color: #FFFFFF;
-        font-weight: 700;
-        font-family: 'DM Sans', sans-serif;
-    }
-    
-    h2, h3 {
-        color: #E8ECF4;
-        font-weight: 600;
-        font-family: 'DM Sans', sans-serif;
-    }
-    
-    /* Dividers */
-    hr {
-        border: none;
-        height: 1px;
-        background: rgba(255, 255, 255, 0.06);
-        margin: 1.5rem 0;
-    }
-    
-    /* Progress bar */
-    .stProgress > div > div > div {
-        background: linear-gradient(90deg, #6366F1, #8B5CF6);
-        border-radius: 10px;
-    }
-    
-    /* Info/Success messages */
-    .stAlert {
-        background: rgba(255, 255, 255, 0.03);
-        border: 1px solid rgba(255, 255, 255, 0.08);
-        border-radius: 12px;
-    }
-    
-    /* Spinner */
-    .stSpinner > div {
-        border-color: #6366F1 transparent transparent transparent;
-    }
-    
-    /* Code blocks */
-    .stCode, code {
-        background: rgba(255, 255, 255, 0.04) !important;
-        border: 1px solid rgba(255, 255, 255, 0.08) !important;
-        border-radius: 8px !important;
-        color: #E8ECF4 !important;
-        font-family: 'JetBrains Mono', monospace !important;
-    }
-    
-    /* File uploader */
-    .stFileUploader > div {
-        background: rgba(255, 255, 255, 0.02);
-        border: 2px dashed rgba(255, 255, 255, 0.1);
-        border-radius: 16px;
-        transition: all 0.25s ease;
-    }
-    
-    .stFileUploader > div:hover {
-        border-color: #6366F1;
-        background: rgba(99, 102, 241, 0.05);
-    }
-    
-    /* Tabs */
-    .stTabs [data-baseweb="tab-list"] {
-        background: rgba(255, 255, 255, 0.03);
-        border-radius: 12px;
-        padding: 4px;
-        gap: 4px;
-    }
-    
-    .stTabs [data-baseweb="tab"] {
-        background: transparent;
-        border-radius: 10px;
-        color: #9CA3AF;
-        font-weight: 500;
-        font-family: 'DM Sans', sans-serif;
-    }
-    
-    .stTabs [aria-selected="true"] {
-        background: rgba(99, 102, 241, 0.15);
-        color: #E8ECF4;
-    }
-    
-    /* DataFrame styling */
-    .stDataFrame {
-        background: rgba(255, 255, 255, 0.02);
-        border-radius: 12px;
-        overflow: hidden;
-        border: 1px solid rgba(255, 255, 255, 0.06);
-    }
-    
-    /* Markdown text */
-    .stMarkdown p {
-        color: #9CA3AF;
-    }
-    
-    /* Labels */
-    .stTextInput label, .stTextArea label, .stSelectbox label {
-        color: #9CA3AF !important;
-        font-weight: 500;
-        font-size: 13px;
-        font-family: 'DM Sans', sans-serif !important;
-    }
-    
-    /* Hide Streamlit branding */
-    #MainMenu, footer, header {
-        visibility: hidden;
-    }
-    
-    /* Premium Scrollbar */
-    ::-webkit-scrollbar {
-        width: 6px;
-        height: 6px;
-    }
-    
-    ::-webkit-scrollbar-track {
-        background: transparent;
-    }
-    
-    ::-webkit-scrollbar-thumb {
-        background: rgba(255, 255, 255, 0.1);
-        border-radius: 3px;
-    }
-    
-    ::-webkit-scrollbar-thumb:hover {
-        background: rgba(255, 255, 255, 0.2);
-    }
-    </style>
-""", unsafe_allow_html=True)
+
+# Injected on every rerun (Streamlit clears the page each run) but the
+# file read and string build are cached, so reruns only resend the blob
+st.markdown(f"<style>{_load_css()}</style>", unsafe_allow_html=True)
 
 
 # --- WEBSITE SCRAPING ---
+@st.cache_resource
+def get_session():
+    """Shared requests.Session with connection pooling and retries.
+
+    Reusing one session keeps TCP/TLS connections alive between requests,
+    so the services-page fetch (same host as the homepage) skips a full
+    handshake, and the thread pool reuses connections across leads.
+
+    requests is imported lazily (cached in sys.modules after the first
+    call) so it doesn't slow the initial page render.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    session.headers.update({
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    })
+    adapter = HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=64,
+        max_retries=Retry(total=2, backoff_factor=0.3)
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+# Cap page downloads - we only ever keep a few KB of extracted text
+_MAX_FETCH_BYTES = 512 * 1024
+
+# Anchors that look like a services page
+_SERVICES_HREF_RE = re.compile(r'service|what-we-do', re.IGNORECASE)
+
+# selectolax (C-based MyHTML) parses and extracts text roughly an order
+# of magnitude faster than BeautifulSoup; BS4 + lxml remains the fallback
+try:
+    from selectolax.parser import HTMLParser as _SelectolaxParser
+except ImportError:
+    _SelectolaxParser = None
+
+
+def _parse_page(content, find_services_link=False):
+    """Extract body text (and optionally a services-page href) from HTML bytes."""
+    if _SelectolaxParser is not None:
+        tree = _SelectolaxParser(content)
+        for tag in tree.css('script, style, nav, footer, header'):
+            tag.decompose()
+        text = tree.body.text(separator=' ', strip=True) if tree.body else ''
+        href = None
+        if find_services_link:
+            # Cap the scan - real sites rarely bury the services link
+            # past the first couple hundred anchors
+            for a_tag in tree.css('a[href]')[:200]:
+                candidate = a_tag.attributes.get('href') or ''
+                if _SERVICES_HREF_RE.search(candidate):
+                    href = candidate
+                    break
+        return text, href
+
+    from bs4 import BeautifulSoup, SoupStrainer
+    soup = BeautifulSoup(content, 'lxml', parse_only=SoupStrainer('body'))
+    for element in soup(['script', 'style', 'nav', 'footer', 'header']):
+        element.decompose()
+    text = soup.get_text(separator=' ', strip=True)
+    href = None
+    if find_services_link:
+        link = soup.find('a', href=_SERVICES_HREF_RE)
+        if link:
+            href = link['href']
+    return text, href
+
+
+def _norm(text, cap):
+    """Whitespace-normalize and truncate to ~cap chars in one pass.
+
+    Unlike re.sub + slice, this never builds a normalized copy of the
+    whole page - it stops accumulating as soon as the cap is reached.
+    """
+    out = []
+    n = 0
+    for tok in text.split():
+        if n + len(tok) + 1 > cap:
+            break
+        out.append(tok)
+        n += len(tok) + 1
+    return ' '.join(out)
+
+
+def _fetch_capped(url, timeout=(3, 7)):
+    """GET a URL, reading at most _MAX_FETCH_BYTES of the body.
+
+    Streams the response so megabyte-sized homepages never get fully
+    downloaded, and splits the timeout into (connect, read) so sites
+    that are slow to first byte fail fast.
+    """
+    resp = get_session().get(url, stream=True, timeout=timeout)
+    try:
+        # Bail before reading anything when the server admits the page
+        # is huge - those are downloads/SPAs, not marketing copy
+        length = resp.headers.get('Content-Length')
+        if length and length.isdigit() and int(length) > 5 * 1024 * 1024:
+            raise ValueError(f"page reports Content-Length {length} bytes")
+        return resp.raw.read(_MAX_FETCH_BYTES, decode_content=True)
+    finally:
+        resp.close()
+
+
+def normalize_url(url):
+    """Normalize a URL so equivalent forms share one cache entry.
+
+    Lowercases the host, strips the trailing slash and drops only the
+    fragment - the query string selects the page on CMS-style URLs
+    (?page_id=7), so it must survive normalization.
+    """
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    parsed = urlparse(url)
+    normalized = f"{parsed.scheme}://{parsed.netloc.lower()}{parsed.path.rstrip('/')}"
+    if parsed.query:
+        normalized += f"?{parsed.query}"
+    return normalized
+
+
 def scrape_website_text(url):
-    """Scrape text content from a website."""
+    """Scrape text content from a website. Results are cached per normalized URL.
+
+    Failures come back as the "Error scraping: ..." string the callers
+    expect; the conversion happens here, outside the cache, so only
+    successful scrapes are memoized.
+    """
     if not url:
         return "", ""
-    
     try:
-        if not url.startswith(('http://', 'https://')):
-            url = 'https://' + url
-        
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        }
-        
-        # Get homepage
-        response = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Remove script and style elements
-        for element in soup(['script', 'style', 'nav', 'footer', 'header']):
-            element.decompose()
-        
-        homepage_text = soup.get_text(separator=' ', strip=True)
-        homepage_text = re.sub(r'\s+', ' ', homepage_text)[:3000]  # Limit text
-        
-        # Try to find and scrape services page
-        services_text = ""
-        services_links = soup.find_all('a', href=True)
-        for link in services_links:
-            href = link['href'].lower()
-            text = link.get_text().lower()
-            if 'service' in href or 'service' in text or 'what-we-do' in href:
-                services_url = href
-                if not services_url.startswith('http'):
-                    parsed = urlparse(url)
-                    services_url = f"{parsed.scheme}://{parsed.netloc}{services_url}"
-                try:
-                    resp = requests.get(services_url, headers=headers, timeout=8)
-                    srv_soup = BeautifulSoup(resp.text, 'html.parser')
-                    for element in srv_soup(['script', 'style', 'nav', 'footer']):
-                        element.decompose()
-                    services_text = srv_soup.get_text(separator=' ', strip=True)
-                    services_text = re.sub(r'\s+', ' ', services_text)[:2000]
-                    break
-                except:
-                    pass
-        
-        return homepage_text, services_text
-        
+        return _scrape_impl(normalize_url(url))
     except Exception as e:
         return f"Error scraping: {str(e)}", ""
 
 
+# Per-host politeness: allow at most 2 concurrent requests to the same domain
+_HOST_SEMAPHORES = defaultdict(lambda: threading.Semaphore(2))
+
+
+def _scrape_polite(url):
+    """Scrape a URL while limiting concurrent hits to its host."""
+    host = urlparse(normalize_url(url)).netloc
+    with _HOST_SEMAPHORES[host]:
+        return scrape_website_text(url)
+
+
+def process_one(comp_name, web_url, comp_niche, contact_email, hp_text, srv_text):
+    """Turn one scraped lead into a batch result row."""
+    scrape_status = "No URL"
+    if web_url:
+        if hp_text and not hp_text.startswith("Error"):
+            scrape_status = "Success"
+        else:
+            scrape_status = f"Failed: {hp_text[:50]}" if hp_text else "Empty response"
+
+    issues, subject, email_body = analyze_and_generate(comp_name, web_url, comp_niche, hp_text, srv_text)
+
+    return {
+        'Company Name': comp_name,
+        'Website': web_url,
+        'Contact Email': contact_email,
+        'Niche': comp_niche,
+        'Scrape Status': scrape_status,
+        'Issues Found': ' | '.join(describe_issues(issues)) if issues else 'None detected',
+        'Subject Line': subject,
+        'Email Body': email_body.replace('\n', ' ')
+    }
+
+
+_RESULT_COLUMNS = ('Company Name', 'Website', 'Contact Email', 'Niche',
+                   'Scrape Status', 'Issues Found', 'Subject Line', 'Email Body')
+
+
+def _run_batch(run_id, leads, progress_q):
+    """Process a batch of leads in a background thread.
+
+    Reports progress events through progress_q and ends with a
+    ('done', results_df, export_csv_bytes) or ('error', message) event.
+    Each finished row is also persisted to batch_runs so a partial run
+    survives a Streamlit restart. Uses its own sqlite connection - the
+    cached one belongs to the main thread's session.
+    """
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+
+        # Scrape in parallel - network I/O overlaps across leads while
+        # the per-host semaphore keeps any single domain from being hammered
+        scrapes = {}
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            futures = {
+                executor.submit(_scrape_polite, web_url): idx
+                for idx, _, web_url, _, _ in leads if web_url
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                idx = futures[future]
+                try:
+                    scrapes[idx] = future.result()
+                except Exception as e:
+                    scrapes[idx] = (f"Error scraping: {str(e)}", "")
+                progress_q.put(('progress', done, len(futures),
+                                f"Scraped {done}/{len(futures)} websites..."))
+
+        # The CSV export is written incrementally alongside the column
+        # arrays so no second full-table string is ever materialized
+        export_buf = io.BytesIO()
+        export_text = io.TextIOWrapper(export_buf, 'utf-8', newline='')
+        export_writer = csv.writer(export_text)
+        export_writer.writerow(_RESULT_COLUMNS)
+
+        result_arrays = {col: np.empty(len(leads), dtype=object) for col in _RESULT_COLUMNS}
+        for pos, (idx, comp_name, web_url, comp_niche, contact_email) in enumerate(leads):
+            hp_text, srv_text = scrapes.get(idx, ("", ""))
+            result_row = process_one(comp_name, web_url, comp_niche, contact_email, hp_text, srv_text)
+            for col in _RESULT_COLUMNS:
+                result_arrays[col][pos] = result_row[col]
+            export_writer.writerow(result_row[col] for col in _RESULT_COLUMNS)
+            # Committed per row so a crash loses at most the row in
+            # flight; WAL + synchronous=NORMAL makes the commit cheap
+            conn.execute('INSERT INTO batch_runs (run_id, row_json) VALUES (?, ?)',
+                         (run_id, json.dumps(result_row)))
+            conn.commit()
+
+        # The run finished, so its crash-recovery rows are no longer
+        # needed - only interrupted runs leave rows behind
+        conn.execute('DELETE FROM batch_runs WHERE run_id = ?', (run_id,))
+        conn.commit()
+        conn.close()
+        export_text.flush()
+        progress_q.put(('done',
+                        pd.DataFrame(result_arrays, columns=_RESULT_COLUMNS),
+                        export_buf.getvalue()))
+    except Exception as e:
+        progress_q.put(('error', str(e)))
+
+
+# persist="disk" keeps scrapes across server restarts - re-running a
+# batch after a redeploy stays network-free for a day
+@st.cache_data(ttl=86400, max_entries=512, show_spinner=False, persist="disk")
+def _scrape_impl(url):
+    """Fetch and extract homepage + services text (pure, no st.* calls).
+
+    Raises on fetch/parse failure rather than returning an error string:
+    st.cache_data doesn't cache exceptions, so a transient DNS glitch or
+    timeout is retried on the next call instead of being memoized (and
+    disk-persisted) as the URL's content for 24 hours.
+    """
+    # Get homepage
+    content = _fetch_capped(url)
+    homepage_text, services_href = _parse_page(content, find_services_link=True)
+    homepage_text = _norm(homepage_text, 3000)  # Limit text
+
+    # Skip the second fetch when the homepage already carries enough
+    # services signal for the analyzer - the extra page is near-duplicate
+    # content on most sites
+    if 'service' in homepage_text.lower() and len(homepage_text) > 1500:
+        return homepage_text, ""
+
+    services_text = ""
+    if services_href:
+        services_url = services_href
+        if not services_url.startswith('http'):
+            parsed = urlparse(url)
+            services_url = f"{parsed.scheme}://{parsed.netloc}{services_url}"
+        try:
+            srv_content = _fetch_capped(services_url, timeout=(3, 5))
+            services_text = _norm(_parse_page(srv_content)[0], 2000)
+        except:
+            pass
+
+    return homepage_text, services_text
+
+
 # --- WEBSITE ANALYSIS ---
+
+# Keyword categories checked by the analyzer. All categories are matched
+# in one pass over the text (Aho-Corasick when pyahocorasick is installed,
+# otherwise one compiled regex sweep per category).
+_CATEGORY_KEYWORDS = {
+    'value': ('help', 'solve', 'achieve', 'result', 'outcome', 'benefit', 'save', 'grow', 'increase'),
+    'cta': ('contact', 'call', 'schedule', 'book', 'get started', 'free quote', 'request', 'consultation'),
+    'trust': ('years', 'experience', 'certified', 'guarantee', 'testimonial', 'review', 'client', 'trusted', 'award'),
+    'diff': ('unique', 'only', 'different', 'unlike', 'specialized', 'exclusive', 'proprietary'),
+    'contact': ('email', 'phone', '@', 'call us'),
+    'service': ('service',),
+}
+
+_CATEGORY_RES = {
+    category: re.compile('|'.join(re.escape(word) for word in words))
+    for category, words in _CATEGORY_KEYWORDS.items()
+}
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+@st.cache_resource
+def _keyword_automaton():
+    """Build one automaton over all category keywords (None if unavailable)."""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for category, words in _CATEGORY_KEYWORDS.items():
+        for word in words:
+            automaton.add_word(word, category)
+    automaton.make_automaton()
+    return automaton
+
+
+def _scan_categories(text):
+    """Return the set of keyword categories present in text."""
+    lowered = text.lower()
+    automaton = _keyword_automaton()
+    if automaton is not None:
+        return {category for _, category in automaton.iter(lowered)}
+    return {category for category, pattern in _CATEGORY_RES.items() if pattern.search(lowered)}
+
+
+# Hash the (potentially multi-KB) text arguments down to an 8-byte digest
+# so cache keys stay small instead of pickling whole page dumps
+@st.cache_data(
+    max_entries=1024,
+    ttl=3600,
+    show_spinner=False,
+    hash_funcs={str: lambda s: hashlib.blake2b(s.encode(), digest_size=8).digest()},
+)
 def analyze_website(company_name, website_url, niche, homepage_text, services_text):
-    """Analyze website text and extract conversion issues."""
-    
+    """Analyze website text and return conversion issue keys (pure; cached).
+
+    Returns keys into ISSUE_DATA / _ISSUE_DESCRIPTIONS rather than prose,
+    so generate_email consumes them directly and the UI renders them via
+    describe_issues - no text-matching round trip in between.
+    """
+
     issues = []
-    combined_text = (homepage_text + " " + services_text).lower()
-    
+    found = _scan_categories(homepage_text + " " + services_text)
+    homepage_len = len(homepage_text)
+
     # Check for value proposition
-    value_words = ['help', 'solve', 'achieve', 'result', 'outcome', 'benefit', 'save', 'grow', 'increase']
-    has_value_prop = any(word in combined_text for word in value_words)
-    if not has_value_prop:
-        issues.append("Homepage describes services but does not communicate clear outcomes or benefits for clients.")
-    
+    if 'value' not in found:
+        issues.append("value_prop")
+
     # Check for CTA
-    cta_words = ['contact', 'call', 'schedule', 'book', 'get started', 'free quote', 'request', 'consultation']
-    has_cta = any(word in combined_text for word in cta_words)
-    if not has_cta:
-        issues.append("No clear call-to-action guiding visitors to take the next step.")
-    
+    if 'cta' not in found:
+        issues.append("cta")
+
     # Check for trust signals
-    trust_words = ['years', 'experience', 'certified', 'guarantee', 'testimonial', 'review', 'client', 'trusted', 'award']
-    has_trust = any(word in combined_text for word in trust_words)
-    if not has_trust:
-        issues.append("Missing trust signals like testimonials, certifications, or experience indicators.")
-    
+    if 'trust' not in found:
+        issues.append("trust")
+
     # Check for differentiation
-    diff_words = ['unique', 'only', 'different', 'unlike', 'specialized', 'exclusive', 'proprietary']
-    has_diff = any(word in combined_text for word in diff_words)
-    if not has_diff and services_text:
-        issues.append("Services section lists offerings without explaining what sets the business apart.")
-    
+    if services_text and 'diff' not in found:
+        issues.append("differentiation")
+
     # Check for clarity
-    if len(homepage_text) < 200:
-        issues.append("Homepage content is too sparse to communicate value effectively.")
-    elif len(homepage_text) > 2500:
-        issues.append("Homepage is text-heavy without clear hierarchy, making it hard to scan quickly.")
-    
+    if homepage_len < 200:
+        issues.append("sparse")
+    elif homepage_len > 2500:
+        issues.append("dense")
+
     # Check for contact info visibility
-    contact_words = ['email', 'phone', '@', 'call us']
-    has_contact = any(word in combined_text for word in contact_words)
-    if not has_contact:
-        issues.append("Contact information is not prominently visible in the main content.")
-    
+    if 'contact' not in found:
+        issues.append("contact")
+
     # Check for services clarity
-    if not services_text and 'service' not in combined_text:
-        issues.append("No dedicated services section explaining what the business offers.")
-    
+    if not services_text and 'service' not in found:
+        issues.append("services")
+
     # Limit to 4 issues max
     return issues[:4]
 
 
+# Human-readable audit text per issue key, for UI display and CSV export
+_ISSUE_DESCRIPTIONS = {
+    "value_prop": "Homepage describes services but does not communicate clear outcomes or benefits for clients.",
+    "cta": "No clear call-to-action guiding visitors to take the next step.",
+    "trust": "Missing trust signals like testimonials, certifications, or experience indicators.",
+    "differentiation": "Services section lists offerings without explaining what sets the business apart.",
+    "sparse": "Homepage content is too sparse to communicate value effectively.",
+    "dense": "Homepage is text-heavy without clear hierarchy, making it hard to scan quickly.",
+    "contact": "Contact information is not prominently visible in the main content.",
+    "services": "No dedicated services section explaining what the business offers.",
+}
+
+
+def describe_issues(issue_keys):
+    """Render issue keys as the human-readable audit statements."""
+    return [_ISSUE_DESCRIPTIONS[key] for key in issue_keys if key in _ISSUE_DESCRIPTIONS]
+
+
 # --- EMAIL GENERATION ---
 
 # Issue data with unique impacts (no duplicated decision logic)
@@ -699,65 +932,72 @@ COMBINED_ISSUES = {
     ("dense", "cta"): "There is a lot of text without structure, and no obvious next step. The key points get buried.",
 }
 
-def map_issue_to_key(issue):
-    """Map detected issue to a key."""
-    issue_lower = issue.lower()
-    if "outcome" in issue_lower or "benefit" in issue_lower or "value" in issue_lower:
-        return "value_prop"
-    elif "call-to-action" in issue_lower or "cta" in issue_lower or "next step" in issue_lower:
-        return "cta"
-    elif "trust" in issue_lower or "testimonial" in issue_lower or "credential" in issue_lower:
-        return "trust"
-    elif "differentiation" in issue_lower or "sets" in issue_lower or "apart" in issue_lower:
-        return "differentiation"
-    elif "sparse" in issue_lower or "too brief" in issue_lower or "too short" in issue_lower:
-        return "sparse"
-    elif "text-heavy" in issue_lower or "hierarchy" in issue_lower or "dense" in issue_lower:
-        return "dense"
-    elif "contact" in issue_lower:
-        return "contact"
-    elif "services section" in issue_lower or "dedicated" in issue_lower:
-        return "services"
-    return None
+def _variant_hash(s):
+    """Deterministic 32-bit hash for template selection.
+
+    Python's builtin hash() is randomized per process (PYTHONHASHSEED),
+    so the same company would get a different email variant after every
+    restart - and cached generate_email entries would never match.
+    zlib.crc32 is a single C call (hardware-accelerated where zlib
+    supports it) instead of a Python-level byte loop.
+    """
+    return zlib.crc32(s.encode())
+
+
+# Template pools for email variants. Static strings are allocated once at
+# import and formatted only at selection time.
+
+# Purposeful openings (no "jumped out", "a few things", no easing in)
+_OPENINGS = (
+    "Looked at {c}'s site. There are a couple of things worth addressing.",
+    "Went through {c}'s website. Two things could use attention.",
+    "Checked out {c}'s site. Couple of quick notes.",
+    "Looked at {c}'s website earlier. Worth flagging two things."
+)
+
+# Confident CTAs (short, specific, no permission asking)
+_CTAS = (
+    "I can outline what I would fix first.",
+    "Happy to send a short list of priorities.",
+    "I can share a quick breakdown of changes.",
+    "I have specific ideas if useful."
+)
+
+# Subject lines
+_SUBJECTS = (
+    "Quick thought on {c}",
+    "Re: {c}",
+    "Your website",
+    "{c}"
+)
+
+# Practical context (one unique angle per email, no duplication)
+_CONTEXTS = (
+    "In {n}, first impressions close deals.",
+    "Most {n} leads decide fast. Clarity wins.",
+    "{ncap} clients reach out to whoever looks credible.",
+    "Speed and trust matter in {n}."
+)
 
+
+@st.cache_data(max_entries=2048, ttl=3600, show_spinner=False)
 def generate_email(company_name, niche, issues):
-    """Generate cold email. Max 2 issues, 120-150 words, no AI signals."""
-    
-    # Purposeful openings (no "jumped out", "a few things", no easing in)
-    openings = [
-        f"Looked at {company_name}'s site. There are a couple of things worth addressing.",
-        f"Went through {company_name}'s website. Two things could use attention.",
-        f"Checked out {company_name}'s site. Couple of quick notes.",
-        f"Looked at {company_name}'s website earlier. Worth flagging two things."
-    ]
-    opening = openings[hash(company_name) % len(openings)]
-    
-    # Confident CTAs (short, specific, no permission asking)
-    ctas = [
-        "I can outline what I would fix first.",
-        "Happy to send a short list of priorities.",
-        "I can share a quick breakdown of changes.",
-        "I have specific ideas if useful."
-    ]
-    cta = ctas[hash(company_name + niche) % len(ctas)]
-    
-    # Subject lines
-    subjects = [
-        f"Quick thought on {company_name}",
-        f"Re: {company_name}",
-        f"Your website",
-        f"{company_name}"
-    ]
-    subject = subjects[hash(company_name) % len(subjects)]
+    """Generate cold email. Max 2 issues, 120-150 words, no AI signals.
+
+    Pure and cached - pass issues as a tuple so repeated batch rows and
+    Streamlit reruns collapse to a cache lookup.
+    """
+    issues = tuple(issues)
     
-    # Practical context (one unique angle per email, no duplication)
-    contexts = [
-        f"In {niche}, first impressions close deals.",
-        f"Most {niche} leads decide fast. Clarity wins.",
-        f"{niche.capitalize()} clients reach out to whoever looks credible.",
-        f"Speed and trust matter in {niche}."
-    ]
-    context = contexts[hash(company_name + niche) % len(contexts)]
+    h_company = _variant_hash(company_name)
+    h_combo = _variant_hash(company_name + '|' + niche)
+
+    # Pools have exactly 4 entries, so & 3 replaces the modulo; the upper
+    # hash bits drive the second selection so the pairs decorrelate
+    opening = _OPENINGS[h_company & 3].format(c=company_name)
+    cta = _CTAS[h_combo & 3]
+    subject = _SUBJECTS[(h_company >> 2) & 3].format(c=company_name)
+    context = _CONTEXTS[(h_combo >> 2) & 3].format(n=niche, ncap=niche.capitalize())
     
     # No issues case
     if not issues:
@@ -774,20 +1014,13 @@ The foundation is there, but the messaging could work harder to convert interest
 Best"""
         return subject, email_body
     
-    # Map issues (max 2, no duplicates)
-    mapped_keys = []
-    used_keys = set()
-    for issue in issues[:4]:
-        key = map_issue_to_key(issue)
-        if key and key not in used_keys:
-            mapped_keys.append(key)
-            used_keys.add(key)
-        if len(mapped_keys) == 2:
-            break
-    
-    # Fallback
+    # analyze_website hands us issue keys directly - keep the first 2
+    # distinct known ones
+    mapped_keys = list(dict.fromkeys(key for key in issues if key in ISSUE_DATA))[:2]
+
+    # Fallback (unknown keys only)
     if not mapped_keys:
-        issue_text = f"{issues[0].rstrip('.')}. That could be affecting how leads perceive the business."
+        issue_text = "The messaging could work harder to convert interest into inquiries."
     elif len(mapped_keys) == 2:
         # Check for pre-combined version (smoother flow)
         pair = (mapped_keys[0], mapped_keys[1])
@@ -820,6 +1053,19 @@ Best"""
     return subject, email_body
 
 
+def analyze_and_generate(company_name, website_url, niche, homepage_text, services_text):
+    """Analyze a website and generate its outreach email in one call.
+
+    Both stages are local and individually cached, so fusing them saves
+    no round-trip here; the point is one entry for the full pipeline so
+    call sites can't drift apart on how issues are threaded between the
+    two. Returns (issue_keys, subject, body).
+    """
+    issues = analyze_website(company_name, website_url, niche, homepage_text, services_text)
+    subject, body = generate_email(company_name, niche, tuple(issues))
+    return issues, subject, body
+
+
 # --- UI LAYOUT ---
 with st.sidebar:
     st.markdown("""
@@ -861,7 +1107,16 @@ with st.sidebar:
             <a href='https://myaccount.google.com/apppasswords' target='_blank' style='color: #6366F1;'>Get App Password →</a>
         </div>
         """, unsafe_allow_html=True)
-    
+
+    # --- CACHE CONTROLS ---
+    with st.expander("🧹 Cache", expanded=False):
+        st.markdown("*Scrapes are cached for 24h; clear to re-fetch fresh copies*")
+        if st.button("🗑️ Clear Cached Results", use_container_width=True):
+            _scrape_impl.clear()
+            analyze_website.clear()
+            generate_email.clear()
+            st.success("✅ Caches cleared - next run fetches fresh data")
+
     st.markdown("---")
     
     st.markdown("""
@@ -1016,20 +1271,15 @@ if generate_btn:
         st.error("Please provide homepage text (paste manually or use auto-scrape).")
     else:
         with st.spinner("Analyzing website..."):
-            time.sleep(0.5)  # Brief pause for UX
-            
-            # Step 1 & 2: Analyze and extract issues
-            issues = analyze_website(company_name, website_url, niche, homepage_text, services_text)
-            
-            # Step 4: Generate email
-            subject, email_body = generate_email(company_name, niche, issues)
+            issue_keys, subject, email_body = analyze_and_generate(
+                company_name, website_url, niche, homepage_text, services_text)
         
         # Store results in session state for persistence
         st.session_state['generated_result'] = {
             'company_name': company_name,
             'website_url': website_url,
             'niche': niche,
-            'issues': issues,
+            'issues': describe_issues(issue_keys),
             'subject': subject,
             'email_body': email_body
         }
@@ -1043,8 +1293,13 @@ if 'generated_result' in st.session_state and st.session_state['generated_result
     # Issues Found
     st.markdown("### 🔍 Issues Identified")
     if result['issues']:
-        for i, issue in enumerate(result['issues'], 1):
-            st.markdown(f'<div class="issue-item">#{i}: {issue}</div>', unsafe_allow_html=True)
+        # One st.markdown for the whole list - one WebSocket message and
+        # one DOM insertion instead of one per issue
+        issues_html = "".join(
+            f'<div class="issue-item">#{i}: {issue}</div>'
+            for i, issue in enumerate(result['issues'], 1)
+        )
+        st.markdown(issues_html, unsafe_allow_html=True)
     else:
         st.info("No major conversion issues detected from the provided text.")
     
@@ -1144,9 +1399,8 @@ if 'generated_result' in st.session_state and st.session_state['generated_result
 st.markdown("---")
 st.markdown("### 📅 Scheduled Emails Queue")
 
-scheduled_rows = get_scheduled_emails()
-if scheduled_rows:
-    scheduled_df = pd.DataFrame(scheduled_rows, columns=['ID', 'Recipient', 'Subject', 'Scheduled Time', 'Status'])
+scheduled_df = get_scheduled_emails()
+if not scheduled_df.empty:
     st.dataframe(scheduled_df, use_container_width=True)
     
     col_process, col_refresh = st.columns(2)
@@ -1172,73 +1426,110 @@ st.markdown("Upload a CSV with columns: `Company Name`, `Website URL`, `Niche`,
 uploaded_file = st.file_uploader("Upload CSV", type=['csv'])
 
 if uploaded_file:
-    df = pd.read_csv(uploaded_file)
+    # dtype='string' skips pandas type inference on every column
+    df = pd.read_csv(uploaded_file, dtype='string')
     st.dataframe(df.head())
     
-    if st.button("🚀 Process All Leads", use_container_width=True):
-        results = []
-        progress = st.progress(0)
-        status = st.empty()
-        
-        for i, row in df.iterrows():
-            progress.progress((i + 1) / len(df))
-            
-            comp_name = str(row.get('Company Name', '')).strip()
-            web_url = str(row.get('Website URL', '')).strip()
-            comp_niche = str(row.get('Niche', '')).strip()
-            contact_email = str(row.get('Contact Email', '')).strip() if 'Contact Email' in df.columns else ''
-            
-            status.write(f"Processing {i+1}/{len(df)}: {comp_name}...")
-            
-            # v1.1: URL normalization
-            if web_url and not web_url.startswith(('http://', 'https://')):
-                web_url = 'https://' + web_url
-            
-            # v1.1: Scrape with explicit error handling
-            hp_text, srv_text = "", ""
-            scrape_status = "No URL"
-            
-            if web_url:
-                try:
-                    hp_text, srv_text = scrape_website_text(web_url)
-                    if hp_text and not hp_text.startswith("Error"):
-                        scrape_status = "Success"
-                    else:
-                        scrape_status = f"Failed: {hp_text[:50]}" if hp_text else "Empty response"
-                except Exception as e:
-                    scrape_status = f"Error: {str(e)[:50]}"
-                    hp_text, srv_text = "", ""
-            
-            # Analyze
-            issues = analyze_website(comp_name, web_url, comp_niche, hp_text, srv_text)
-            subject, email_body = generate_email(comp_name, comp_niche, issues)
-            
-            results.append({
-                'Company Name': comp_name,
-                'Website': web_url,
-                'Contact Email': contact_email,
-                'Niche': comp_niche,
-                'Scrape Status': scrape_status,
-                'Issues Found': ' | '.join(issues) if issues else 'None detected',
-                'Subject Line': subject,
-                'Email Body': email_body.replace('\n', ' ')
-            })
-            
-            time.sleep(1)  # Rate limiting
-        
-        progress.empty()
-        status.success(f"✅ Processed {len(results)} leads!")
-        
-        # Store results in session state for batch approval
-        st.session_state['batch_results'] = results
-        
-        results_df = pd.DataFrame(results)
+    batch_worker = st.session_state.get('batch_worker')
+    batch_running = batch_worker is not None and batch_worker.is_alive()
+
+    if st.button("🚀 Process All Leads", use_container_width=True, disabled=batch_running):
+        # Collect and normalize leads up front. itertuples avoids the
+        # per-row Series construction of iterrows; reindex fills any
+        # missing columns with '' so partial CSVs still work.
+        lead_cols = df.reindex(columns=['Company Name', 'Website URL', 'Niche', 'Contact Email'], fill_value='')
+
+        # Vectorized cleanup: strip every column and prefix bare domains
+        # with https:// in whole-column .str ops instead of per row
+        lead_cols = lead_cols.fillna('').apply(lambda col: col.str.strip())
+        urls = lead_cols['Website URL']
+        needs_scheme = (urls != '') & ~urls.str.startswith(('http://', 'https://'))
+        lead_cols['Website URL'] = urls.mask(needs_scheme, 'https://' + urls)
+
+        leads = [
+            (i, comp_name, web_url, comp_niche, contact_email)
+            for i, (comp_name, web_url, comp_niche, contact_email) in enumerate(
+                lead_cols.itertuples(index=False, name=None))
+        ]
+
+        # Run the batch in a background thread so the UI stays
+        # responsive and a browser disconnect doesn't kill progress.
+        # The script polls the queue and reruns until the worker is done.
+        run_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+        progress_q = queue.Queue()
+        worker = threading.Thread(target=_run_batch, args=(run_id, leads, progress_q), daemon=True)
+        st.session_state['batch_worker'] = worker
+        st.session_state['batch_queue'] = progress_q
+        st.session_state.pop('batch_results', None)
+        st.session_state.pop('batch_export', None)
+        st.session_state.pop('batch_error', None)
+        worker.start()
+        st.rerun()
+
+    if batch_worker is not None:
+        # Check liveness BEFORE draining: if the worker is already dead
+        # here, its final event is guaranteed to be in the queue, so the
+        # drain below can't miss it. (Draining first races a worker that
+        # posts 'done' and exits between the drain and the check.)
+        worker_done = not batch_worker.is_alive()
+        if worker_done:
+            batch_worker.join()
+
+        latest_progress = None
+        while True:
+            try:
+                event = st.session_state['batch_queue'].get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == 'progress':
+                latest_progress = event
+            elif event[0] == 'done':
+                st.session_state['batch_results'] = event[1]
+                st.session_state['batch_export'] = event[2]
+            elif event[0] == 'error':
+                st.session_state['batch_error'] = event[1]
+
+        if worker_done:
+            st.session_state['batch_worker'] = None
+        else:
+            if latest_progress:
+                _, done, total, message = latest_progress
+                st.progress(done / total if total else 0.0)
+                st.write(message)
+            else:
+                st.write("Batch running...")
+            time.sleep(0.5)
+            st.rerun()
+    elif 'batch_results' not in st.session_state:
+        # Rows left in batch_runs belong to a run that was interrupted
+        # (completed runs delete theirs) - offer to recover them
+        leftover = get_conn().execute('SELECT row_json FROM batch_runs ORDER BY id').fetchall()
+        if leftover:
+            st.warning(f"Found {len(leftover)} processed lead(s) from an interrupted batch.")
+            col_recover, col_discard = st.columns(2)
+            if col_recover.button("♻️ Recover Partial Results", use_container_width=True):
+                recovered_df = pd.DataFrame(
+                    [json.loads(r[0]) for r in leftover], columns=_RESULT_COLUMNS)
+                st.session_state['batch_results'] = recovered_df
+                st.session_state['batch_export'] = recovered_df.to_csv(index=False).encode('utf-8')
+                with _DB_WRITE_LOCK, get_conn() as conn:
+                    conn.execute('DELETE FROM batch_runs')
+                st.rerun()
+            if col_discard.button("🗑️ Discard", use_container_width=True):
+                with _DB_WRITE_LOCK, get_conn() as conn:
+                    conn.execute('DELETE FROM batch_runs')
+                st.rerun()
+
+    if st.session_state.get('batch_error'):
+        st.error(f"❌ Batch failed: {st.session_state['batch_error']}")
+    elif 'batch_results' in st.session_state:
+        results_df = st.session_state['batch_results']
+        st.success(f"✅ Processed {len(results_df)} leads!")
         st.dataframe(results_df)
-        
-        csv = results_df.to_csv(index=False).encode('utf-8')
+
         st.download_button(
             "📥 Download All Results",
-            csv,
+            st.session_state['batch_export'],
             "lead_emails.csv",
             "text/csv",
             use_container_width=True
@@ -1248,11 +1539,19 @@ if uploaded_file:
 st.markdown("---")
 st.markdown("### 📋 Email Tracking Log")
 
-log_rows = get_email_log()
-if log_rows:
-    log_df = pd.DataFrame(log_rows, columns=['Timestamp', 'Company', 'Website', 'Email', 'Niche', 'Subject', 'Status', 'Notes'])
+log_total = get_email_log_count()
+if log_total > 0:
+    log_pages = (log_total + 99) // 100
+    if log_pages > 1:
+        log_page = st.number_input(
+            f"Page (of {log_pages}, {log_total} emails)",
+            min_value=1, max_value=log_pages, value=1, key="log_page"
+        )
+    else:
+        log_page = 1
+    log_df = get_email_log(page=log_page)
     st.dataframe(log_df, use_container_width=True)
-    
+
     csv_log = log_df.to_csv(index=False).encode('utf-8')
     st.download_button(
         "📥 Export Log to CSV",
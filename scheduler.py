@@ -22,43 +22,156 @@ from datetime import datetime
 DB_PATH = os.path.join(os.path.dirname(__file__), 'leadgen.db')
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'config.json')
 
+# Log bodies are stored zstd-compressed, matching the app's writes so
+# every email_log row is small regardless of which process logged it
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def _compress_body(body):
+    """Compress an email body for log storage (plain text when zstd absent)."""
+    if zstandard is None:
+        return body
+    return zstandard.ZstdCompressor().compress(body.encode())
+
+
+_CONN = None
+
+
+def get_conn():
+    """Return a persistent database connection, creating it on first use.
+
+    WAL mode lets the Streamlit app write while this service reads, and
+    synchronous=NORMAL avoids an fsync per transaction.
+    """
+    global _CONN
+    if _CONN is None:
+        _CONN = sqlite3.connect(DB_PATH)
+        _CONN.execute("PRAGMA journal_mode=WAL")
+        _CONN.execute("PRAGMA synchronous=NORMAL")
+    return _CONN
+
+
+_CFG_CACHE = {"mtime": None, "data": {}}
+
 
 def load_config():
-    """Load Gmail credentials from config file."""
+    """Load Gmail credentials, re-reading the file only when it changes."""
     try:
-        with open(CONFIG_PATH, 'r') as f:
-            return json.load(f)
-    except:
+        mtime = os.stat(CONFIG_PATH).st_mtime_ns
+    except OSError:
         return {}
+    if _CFG_CACHE["mtime"] != mtime:
+        try:
+            with open(CONFIG_PATH, 'r') as f:
+                _CFG_CACHE["data"] = json.load(f)
+            _CFG_CACHE["mtime"] = mtime
+        except Exception:
+            return {}
+    return _CFG_CACHE["data"]
 
 
-def send_email(recipient, subject, body, config):
-    """Send email via Gmail SMTP."""
-    gmail_address = config.get('gmail_address')
-    gmail_password = config.get('gmail_app_password')
-    
-    if not gmail_address or not gmail_password:
-        return False, "Gmail credentials not configured in config.json"
-    
-    try:
-        msg = MIMEMultipart()
-        msg['From'] = gmail_address
-        msg['To'] = recipient
-        msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'plain'))
-        
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as server:
-            server.login(gmail_address, gmail_password)
-            server.send_message(msg)
-        
-        return True, "Sent successfully"
-    except Exception as e:
-        return False, str(e)
-
-
-def process_scheduled_emails():
+def build_message(sender, recipient, subject, body):
+    """Build a plain-text MIME message."""
+    msg = MIMEMultipart()
+    msg['From'] = sender
+    msg['To'] = recipient
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+
+class GmailConnection:
+    """A reusable Gmail SMTP connection for sending a batch of emails.
+
+    Opening and logging into SMTP is the slow part of sending; doing it
+    once per batch instead of once per email cuts most of the overhead.
+    Reconnects automatically if the connection drops mid-batch.
+    """
+
+    def __init__(self, config):
+        self.address = config.get('gmail_address')
+        self.password = config.get('gmail_app_password')
+        self.server = None
+        self._template_cache = {}
+
+    def __enter__(self):
+        if not self.address or not self.password:
+            raise RuntimeError("Gmail credentials not configured in config.json")
+        self._connect()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._close()
+        return False
+
+    def _connect(self):
+        self.server = smtplib.SMTP_SSL('smtp.gmail.com', 465)
+        self.server.login(self.address, self.password)
+
+    def _close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except Exception:
+                pass
+            self.server = None
+
+    def _message_bytes(self, recipient, subject, body):
+        """Serialized message for recipient, reusing a precompiled template.
+
+        MIME assembly and serialization are done once per unique
+        (subject, body) pair; further recipients of the same email only
+        pay for a byte-level To: substitution.
+        """
+        key = (subject, body)
+        template = self._template_cache.get(key)
+        if template is None:
+            template = build_message(self.address, '__RECIPIENT__', subject, body).as_bytes()
+            self._template_cache[key] = template
+        return template.replace(b'__RECIPIENT__', recipient.encode('ascii'))
+
+    def send(self, recipient, subject, body):
+        """Send one email, retrying transient failures with backoff.
+
+        Dropped connections and 4xx (temporary) SMTP responses get up to
+        two retries with 1s then 2s waits; permanent errors fail
+        immediately so a bad address never burns retry time.
+        """
+        try:
+            data = self._message_bytes(recipient, subject, body)
+        except UnicodeEncodeError:
+            return False, f"Non-ASCII recipient address: {recipient}"
+
+        last_error = "unknown error"
+        for attempt in range(3):
+            if attempt:
+                time.sleep(2 ** (attempt - 1))
+                try:
+                    self._close()
+                    self._connect()
+                except Exception as e:
+                    last_error = str(e)
+                    continue
+            try:
+                self.server.sendmail(self.address, [recipient], data)
+                return True, "Sent successfully"
+            except smtplib.SMTPServerDisconnected as e:
+                last_error = str(e)
+            except smtplib.SMTPResponseException as e:
+                last_error = str(e)
+                if not 400 <= e.smtp_code < 500:
+                    return False, last_error
+            except Exception as e:
+                return False, str(e)
+        return False, last_error
+
+
+def process_scheduled_emails(config):
     """Check for emails due to be sent and send them."""
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_conn()
     cursor = conn.cursor()
     
     # Get emails that are due
@@ -72,52 +185,80 @@ def process_scheduled_emails():
     due_emails = cursor.fetchall()
     
     if due_emails:
-        config = load_config()
-        
-        for email in due_emails:
+        outcomes = []
+        try:
+            with GmailConnection(config) as sender:
+                for email in due_emails:
+                    email_id, recipient, subject, body, company_name, website, niche = email
+                    print(f"[{datetime.now().strftime('%H:%M:%S')}] Sending to {recipient}...")
+                    success, message = sender.send(recipient, subject, body)
+                    outcomes.append((email, success, message))
+                    print(f"  {'✓ Sent!' if success else f'✗ Failed: {message}'}")
+        except Exception as e:
+            # Connection-level failure: everything not yet attempted fails too
+            attempted = {o[0][0] for o in outcomes}
+            for email in due_emails:
+                if email[0] not in attempted:
+                    outcomes.append((email, False, str(e)))
+
+        # Batch all status updates and log inserts into one transaction
+        update_rows = []
+        log_rows = []
+        now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        for email, success, message in outcomes:
             email_id, recipient, subject, body, company_name, website, niche = email
-            
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] Sending to {recipient}...")
-            success, message = send_email(recipient, subject, body, config)
-            
-            # Update status
-            new_status = 'Sent' if success else f'Failed: {message}'
-            cursor.execute('UPDATE scheduled_emails SET status = ? WHERE id = ?', (new_status, email_id))
-            
-            # Log to email_log table
-            cursor.execute('''
-                INSERT INTO email_log (timestamp, company_name, website, contact_email, niche, subject, body, status, notes)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                company_name, website, recipient, niche, subject, body,
+            update_rows.append(('Sent' if success else f'Failed: {message}', email_id))
+            log_rows.append((
+                now_str,
+                company_name, website, recipient, niche, subject, _compress_body(body),
                 'Yes (Scheduled)' if success else 'Failed (Scheduled)',
                 message if not success else ''
             ))
-            
-            print(f"  {'✓ Sent!' if success else f'✗ Failed: {message}'}")
-        
+
+        cursor.executemany('UPDATE scheduled_emails SET status = ? WHERE id = ?', update_rows)
+        cursor.executemany('''
+            INSERT INTO email_log (timestamp, company_name, website, contact_email, niche, subject, body, status, notes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', log_rows)
         conn.commit()
-    
-    conn.close()
+
     return len(due_emails)
 
 
+def seconds_until_next_due():
+    """Return how long to sleep before the next pending email is due.
+
+    Falls back to 60 seconds when the queue is empty (or on any error) so
+    newly scheduled emails are still picked up within a minute.
+    """
+    try:
+        row = get_conn().execute(
+            "SELECT MIN(scheduled_time) FROM scheduled_emails WHERE status = 'Pending'"
+        ).fetchone()
+        if row and row[0]:
+            next_due = datetime.strptime(row[0], "%Y-%m-%d %H:%M:%S")
+            wait = (next_due - datetime.now()).total_seconds()
+            return max(1, min(wait, 60))
+    except Exception:
+        pass
+    return 60
+
+
 def main():
     print("=" * 50)
     print("LeadGen Pro - Email Scheduler Service")
     print("=" * 50)
     print(f"Database: {DB_PATH}")
     print(f"Config: {CONFIG_PATH}")
-    print("Checking every 60 seconds for scheduled emails...")
+    print("Sleeping until the next scheduled email is due...")
     print("Press Ctrl+C to stop.\n")
-    
+
     while True:
         try:
-            processed = process_scheduled_emails()
+            processed = process_scheduled_emails(load_config())
             if processed > 0:
                 print(f"[{datetime.now().strftime('%H:%M:%S')}] Processed {processed} email(s)")
-            time.sleep(60)  # Check every minute
+            time.sleep(seconds_until_next_due())
         except KeyboardInterrupt:
             print("\nScheduler stopped.")
             break